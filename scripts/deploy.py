@@ -0,0 +1,95 @@
+import argparse
+import glob
+import logging
+import os
+from typing import Optional
+
+from utils import (
+    FabricApiError,
+    get_access_token_spn,
+    get_or_create_workspace,
+    assign_workspace_admins,
+    publish_items_from_folders,
+)
+
+ENV_LABELS = {"dev": "DEV", "prd": "PROD"}
+
+
+def main(env: Optional[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Deploy PBIP Report & SemanticModel to a Fabric workspace using Fabric REST APIs."
+    )
+    if env is None:
+        parser.add_argument(
+            "--env",
+            required=True,
+            choices=sorted(ENV_LABELS),
+            help="Target environment.",
+        )
+    parser.add_argument(
+        "--workspace",
+        required=True,
+        help="Fabric workspace name",
+    )
+    parser.add_argument(
+        "--capacity",
+        default="",
+        help="(Optional) Capacity ID to assign the workspace to.",
+    )
+    parser.add_argument(
+        "--admin-upns",
+        default="",
+        help="(Optional) Comma-separated admin UPNs to assign on the workspace.",
+    )
+
+    args = parser.parse_args()
+    env_label = ENV_LABELS[env or args.env]
+
+    # utils logs through the "fabric_cli" logger; INFO keeps the CI output,
+    # while the per-call API trace stays at DEBUG (enable with -v if needed).
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    print(f"=== 🚀 DEPLOY TO {env_label} ===")
+
+    # 1. Auth SPN -> token
+    print("Authenticating with Service Principal (client_credentials)...")
+    token = get_access_token_spn()
+    print("✅ SPN authentication successful.")
+
+    # 2. Workspace
+    ws_id = get_or_create_workspace(
+        workspace_name=args.workspace,
+        token=token,
+        capacity_id=args.capacity or None,
+    )
+    print(f"Using workspace '{args.workspace}' (id={ws_id})")
+
+    if args.admin_upns:
+        assign_workspace_admins(ws_id, args.admin_upns, token)
+
+    # 3. Collect Semantic Models (*.SemanticModel in src/)
+    semantic_folders = glob.glob(os.path.join("src", "*.SemanticModel"))
+    if not semantic_folders:
+        print("No *.SemanticModel folders found under src/ – skipping semantic models.")
+
+    # 4. Collect Reports (*.Report in src/)
+    report_folders = glob.glob(os.path.join("src", "*.Report"))
+    if not report_folders:
+        print("No *.Report folders found under src/ – skipping reports.")
+
+    # 5. Deploy all items concurrently – each artifact is independent, so
+    #    wall time drops to roughly max(semantic, report) instead of the sum.
+    targets = [(folder, "SemanticModel") for folder in semantic_folders]
+    targets += [(folder, "Report") for folder in report_folders]
+
+    try:
+        publish_items_from_folders(ws_id, targets, token)
+    except FabricApiError as exc:
+        print(f"❌ {exc}")
+        raise SystemExit(1)
+
+    print(f"\n🎉 {env_label} deployment finished successfully.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,96 @@
+import functools
+import hashlib
+import logging
 import os
 import sys
 import base64
 import json
+import mmap
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import msal
+except ImportError:
+    msal = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pybase64 is a drop-in SIMD (AVX2/SSSE3) implementation, typically 4-10x
+# faster than the stdlib's scalar loop on large binary parts.
+try:
+    import pybase64
+    _b64encode = pybase64.b64encode
+except ImportError:
+    _b64encode = base64.b64encode
+
+
+def _loads(data):
+    """Decode a JSON payload with orjson when available (2-5x faster on the
+    multi-MB workspace/items listings of large tenants)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj) -> bytes:
+    """Encode a JSON body with orjson when available. The definition bodies
+    carry dozens of large base64 strings, where the Rust encoder is several
+    times faster and skips the str -> bytes copy."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
 
 FABRIC_API_BASE = "https://api.fabric.microsoft.com/v1"
 
+log = logging.getLogger("fabric_cli")
+
+
+@functools.lru_cache(maxsize=1)
+def _session() -> requests.Session:
+    """Single shared session: a urllib3 pool keeps per-host connections, so
+    AAD and Fabric calls reuse their respective keep-alive connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        # Fabric throttles bursts with 429 + Retry-After; retrying here keeps
+        # one transient throttle from aborting a whole multi-item deploy.
+        # The create/update calls are idempotent enough to retry POSTs too.
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
+            respect_retry_after_header=True,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.headers["Accept"] = "application/json"
+    return session
+
+
+
+# Cached SPN tokens shared by all Fabric API calls in this process, keyed by
+# (tenant_id, client_id). Refreshed 5 minutes before expiry so in-flight
+# requests never carry a stale token.
+_TOKEN_CACHE: Dict[tuple, tuple] = {}  # key -> (token, expiry)
+_TOKEN_EXPIRY_MARGIN = 300.0
+_TOKEN_LOCK = threading.Lock()
+
+# Lazily built msal.ConfidentialClientApplication (when msal is installed).
+_MSAL_APP = None
+
 
 # ======================================================================================
 # Exceptions
@@ -17,13 +100,16 @@ class FabricAuthError(Exception):
     pass
 
 class FabricApiError(Exception):
-    pass
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
 
 
 # ======================================================================================
 # Authentication
 # ======================================================================================
 
+@functools.lru_cache(maxsize=None)
 def _get_env_or_fail(name: str) -> str:
     value = os.getenv(name)
     if not value:
@@ -31,11 +117,44 @@ def _get_env_or_fail(name: str) -> str:
     return value
 
 
+def _get_access_token_msal() -> str:
+    global _MSAL_APP
+
+    with _TOKEN_LOCK:
+        if _MSAL_APP is None:
+            _MSAL_APP = msal.ConfidentialClientApplication(
+                _get_env_or_fail("FABRIC_CLIENT_ID"),
+                authority=f"https://login.microsoftonline.com/{_get_env_or_fail('FABRIC_TENANT_ID')}",
+                client_credential=_get_env_or_fail("FABRIC_CLIENT_SECRET"),
+            )
+
+        # MSAL keeps its own in-memory token cache and only hits AAD when the
+        # cached token is expired.
+        result = _MSAL_APP.acquire_token_for_client(
+            scopes=["https://api.fabric.microsoft.com/.default"]
+        )
+
+    token = result.get("access_token")
+    if not token:
+        raise FabricAuthError(f"Failed to acquire token via MSAL: {result}")
+
+    return token
+
+
 def get_access_token_spn() -> str:
+    if msal is not None:
+        return _get_access_token_msal()
+
     tenant_id = _get_env_or_fail("FABRIC_TENANT_ID")
     client_id = _get_env_or_fail("FABRIC_CLIENT_ID")
     client_secret = _get_env_or_fail("FABRIC_CLIENT_SECRET")
 
+    cache_key = (tenant_id, client_id)
+    with _TOKEN_LOCK:
+        cached = _TOKEN_CACHE.get(cache_key)
+        if cached and time.monotonic() < cached[1] - _TOKEN_EXPIRY_MARGIN:
+            return cached[0]
+
     token_url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
 
     data = {
@@ -45,17 +164,22 @@ def get_access_token_spn() -> str:
         "scope": "https://api.fabric.microsoft.com/.default",
     }
 
-    resp = requests.post(token_url, data=data)
+    resp = _session().post(token_url, data=data)
 
     if resp.status_code != 200:
         raise FabricAuthError(
             f"Failed to acquire token. HTTP {resp.status_code}: {resp.text}"
         )
 
-    token = resp.json().get("access_token")
+    payload = _loads(resp.content)
+    token = payload.get("access_token")
     if not token:
         raise FabricAuthError("Token response missing 'access_token'.")
 
+    expiry = time.monotonic() + float(payload.get("expires_in", 3600))
+    with _TOKEN_LOCK:
+        _TOKEN_CACHE[cache_key] = (token, expiry)
+
     return token
 
 
@@ -64,83 +188,372 @@ def get_access_token_spn() -> str:
 # ======================================================================================
 
 def fabric_request(method: str, path: str, token: str, **kwargs) -> requests.Response:
-    url = f"{FABRIC_API_BASE}/{path.lstrip('/')}"
+    # Absolute URLs are accepted as-is so LRO Location headers can be polled.
+    if path.startswith("https://"):
+        url = path
+    else:
+        url = f"{FABRIC_API_BASE}/{path.lstrip('/')}"
     headers = kwargs.pop("headers", {})
     headers["Authorization"] = f"Bearer {token}"
 
-    if "json" in kwargs and "Content-Type" not in headers:
-        headers["Content-Type"] = "application/json"
+    if "json" in kwargs:
+        # Always send a plain bytes body: requests writes it to the socket in
+        # chunks anyway, and unlike a generator it can be replayed when the
+        # adapter retries a throttled POST.
+        kwargs["data"] = _dumps(kwargs.pop("json"))
+        if "Content-Type" not in headers:
+            headers["Content-Type"] = "application/json"
 
-    print(f"Calling Fabric API: {method} {url}")
-    resp = requests.request(method, url, headers=headers, **kwargs)
+    log.debug("Calling Fabric API: %s %s", method, url)
+    try:
+        resp = _session().request(method, url, headers=headers, **kwargs)
+    except requests.RequestException as exc:
+        # Exhausted adapter retries (RetryError), connection failures etc.
+        # surface as the one exception type every call site handles.
+        raise FabricApiError(f"{method} {url} failed: {exc}") from exc
 
     # We do NOT raise for 202; only for 4xx or 5xx
     if resp.status_code >= 400:
+        # Bound the body to 2KB: enough to diagnose, without decoding a
+        # potentially huge error page just for the message.
         raise FabricApiError(
-            f"{method} {url} failed. HTTP {resp.status_code}: {resp.text}"
+            f"{method} {url} failed. HTTP {resp.status_code}: "
+            f"{resp.content[:2048].decode('utf-8', 'replace')}",
+            status_code=resp.status_code,
         )
 
     return resp
 
 
+def _poll_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with jitter: the first poll fires almost
+    immediately and parallel pollers desynchronize instead of herding."""
+    return min(cap, base * 2 ** attempt) * (0.5 + random.random())
+
+
+def _wait_for_operation(resp: requests.Response, token: str, timeout: float = 120.0) -> Optional[Dict]:
+    """Poll the async operation behind a 202 response until it completes.
+
+    Sleeps according to the server's Retry-After header (clamped to
+    [0.5s, 30s]); when the header is absent, falls back to exponential
+    backoff with jitter so parallel deploys don't poll in lock-step.
+    Returns the final operation payload, or None when the response carried
+    no Location header to poll.
+    """
+    location = resp.headers.get("Location")
+    if not location:
+        return None
+
+    deadline = time.monotonic() + timeout
+    attempt = 0
+
+    while time.monotonic() < deadline:
+        retry_after = resp.headers.get("Retry-After")
+        wait = None
+        if retry_after:
+            try:
+                wait = min(max(float(retry_after), 0.5), 30.0)
+            except ValueError:
+                # RFC 7231 also allows an HTTP-date here; treat it like a
+                # missing header rather than killing a valid 202 poll.
+                wait = None
+        if wait is None:
+            wait = _poll_delay(attempt)
+            attempt += 1
+        time.sleep(wait)
+
+        resp = fabric_request("GET", location, token)
+        try:
+            operation = _loads(resp.content)
+        except ValueError:
+            operation = {}
+
+        status = operation.get("status")
+        if status == "Succeeded":
+            return operation
+        if status in ("Failed", "Cancelled"):
+            raise FabricApiError(f"Fabric operation failed: {operation}")
+
+        location = resp.headers.get("Location", location)
+
+    raise FabricApiError(f"Timeout waiting for Fabric operation at {location}.")
+
+
 # ======================================================================================
 # Workspace Management
 # ======================================================================================
 
-def get_or_create_workspace(workspace_name: str, token: str, capacity_id: Optional[str] = None) -> str:
+# Name -> id cache persisted between runs so the hot "workspace already
+# exists" CI path skips the (potentially large) GET /workspaces listing.
+_WS_CACHE_FILE = ".fabric-cache.json"
+
+
+def _load_ws_cache() -> Dict:
+    try:
+        with open(_WS_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
+
+def _save_ws_cache(cache: Dict) -> None:
+    try:
+        with open(_WS_CACHE_FILE, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=1)
+def _workspace_index(token: str) -> Dict[str, str]:
+    """Fetch GET /workspaces once per process and index it by displayName.
+
+    On large tenants the listing is the slowest call in the pipeline, so
+    repeated lookups in the same run reuse the memoized name -> id map.
+    """
     resp = fabric_request("GET", "workspaces", token)
-    data = resp.json()
+    data = _loads(resp.content)
     workspaces = data.get("value", data.get("workspaces", []))
+    return {ws.get("displayName"): ws["id"] for ws in workspaces}
+
 
-    for ws in workspaces:
-        if ws.get("displayName") == workspace_name:
-            print(f"Workspace '{workspace_name}' already exists (id={ws['id']}).")
-            return ws["id"]
+def get_or_create_workspace(workspace_name: str, token: str, capacity_id: Optional[str] = None) -> str:
+
+    cache = _load_ws_cache()
+    cache_key = f"{os.getenv('FABRIC_TENANT_ID', '')}/{workspace_name}"
+    cached_id = cache.get(cache_key)
+
+    if cached_id:
+        try:
+            resp = fabric_request("GET", f"workspaces/{cached_id}", token)
+            # The id existing is not enough: if the workspace was renamed
+            # since the cache was written, deploying to it would silently
+            # target the wrong workspace while the real name goes unclaimed.
+            if _loads(resp.content).get("displayName") == workspace_name:
+                log.info("Workspace '%s' found in cache (id=%s).", workspace_name, cached_id)
+                return cached_id
+            cache.pop(cache_key, None)
+        except FabricApiError:
+            # Stale entry – the workspace was deleted or recreated.
+            cache.pop(cache_key, None)
 
     body = {"displayName": workspace_name}
     if capacity_id:
         body["capacityId"] = capacity_id
 
-    print(f"Creating workspace '{workspace_name}'...")
-    resp = fabric_request("POST", "workspaces", token, json=body)
-    ws = resp.json()
-
-    print(f"Workspace created (id={ws['id']}).")
-    return ws["id"]
+    # Try the create first: on re-runs a 409 tells us it already exists,
+    # which is cheaper than always paging through GET /workspaces.
+    log.info("Creating workspace '%s'...", workspace_name)
+    try:
+        resp = fabric_request("POST", "workspaces", token, json=body)
+    except FabricApiError as exc:
+        if exc.status_code != 409:
+            raise
+
+        ws_id = _workspace_index(token).get(workspace_name)
+        if ws_id is None:
+            raise
+        log.info("Workspace '%s' already exists (id=%s).", workspace_name, ws_id)
+    else:
+        ws_id = _loads(resp.content)["id"]
+        log.info("Workspace created (id=%s).", ws_id)
+
+    cache[cache_key] = ws_id
+    _save_ws_cache(cache)
+    return ws_id
+
+
+def assign_workspace_admins(workspace_id: str, admin_upns: str, token: str) -> None:
+    """Best-effort Admin role assignments.
+
+    The roleAssignments API wants the principal's Entra object-id GUID;
+    FABRIC_ADMIN_UPNS may carry UPNs instead, and resolving those needs a
+    Graph token this pipeline does not have. Failures are therefore logged
+    and skipped rather than aborting the deploy, and an 'already assigned'
+    conflict counts as success so re-runs stay idempotent.
+    """
+    upns = [u.strip() for u in admin_upns.split(",") if u.strip()]
+    if not upns:
+        return
+
+    def _assign(upn: str) -> None:
+        body = {
+            "principal": {"id": upn, "type": "User"},
+            "role": "Admin",
+        }
+        try:
+            fabric_request(
+                "POST",
+                f"workspaces/{workspace_id}/roleAssignments",
+                token,
+                json=body,
+            )
+        except FabricApiError as exc:
+            if exc.status_code == 409:
+                log.info("'%s' already has a role on the workspace.", upn)
+                return
+            log.warning("Could not assign Admin role to '%s': %s", upn, exc)
+            return
+        log.info("Assigned Admin role to '%s'.", upn)
+
+    # Each assignment is independent, so fan them out instead of paying one
+    # round-trip after another.
+    with ThreadPoolExecutor(max_workers=min(10, len(upns))) as executor:
+        futures = [executor.submit(_assign, upn) for upn in upns]
+        for future in futures:
+            future.result()
 
 
 # ======================================================================================
 # Helpers
 # ======================================================================================
 
+# Items listings memoized per (workspace_id, item_type) so deploying several
+# items does not re-fetch the same workspace state for each one. Entries
+# expire after a short TTL so a long-running process never acts on stale
+# state, and the cache is size-capped.
+_ITEMS_CACHE: Dict[tuple, tuple] = {}  # key -> (fetched_at, items)
+_ITEMS_CACHE_TTL = 30.0
+_ITEMS_CACHE_MAX = 64
+_ITEMS_INDEX_CACHE: Dict[str, Dict[tuple, str]] = {}
+_ITEMS_CACHE_LOCK = threading.Lock()
+
+
+def _invalidate_items_cache(workspace_id: str, item_type: str) -> None:
+    with _ITEMS_CACHE_LOCK:
+        _ITEMS_CACHE.pop((workspace_id, item_type), None)
+        _ITEMS_INDEX_CACHE.pop(workspace_id, None)
+
+
+def _index_items(workspace_id: str, token: str) -> Dict[tuple, str]:
+    """Fetch all workspace items in one GET and index them for O(1) lookups.
+
+    One unfiltered listing replaces the per-type pre-check GETs, and the
+    (type, displayName) -> id map is memoized so concurrent deploys of
+    several items share a single round-trip.
+    """
+    with _ITEMS_CACHE_LOCK:
+        if workspace_id in _ITEMS_INDEX_CACHE:
+            return _ITEMS_INDEX_CACHE[workspace_id]
+
+    resp = fabric_request("GET", f"workspaces/{workspace_id}/items", token)
+    data = _loads(resp.content)
+    items = data.get("value", data.get("items", []))
+    index = {(it.get("type"), it.get("displayName")): it["id"] for it in items}
+
+    with _ITEMS_CACHE_LOCK:
+        _ITEMS_INDEX_CACHE[workspace_id] = index
+
+    return index
+
+
 def list_items_by_type(workspace_id: str, item_type: str, token: str) -> List[Dict]:
+    cache_key = (workspace_id, item_type)
+    with _ITEMS_CACHE_LOCK:
+        cached = _ITEMS_CACHE.get(cache_key)
+        if cached and time.monotonic() - cached[0] < _ITEMS_CACHE_TTL:
+            return cached[1]
+
     path = f"workspaces/{workspace_id}/items?type={item_type}"
     resp = fabric_request("GET", path, token)
-    data = resp.json()
-    return data.get("value", data.get("items", []))
+    data = _loads(resp.content)
+    items = data.get("value", data.get("items", []))
 
+    with _ITEMS_CACHE_LOCK:
+        if len(_ITEMS_CACHE) >= _ITEMS_CACHE_MAX:
+            oldest = min(_ITEMS_CACHE, key=lambda k: _ITEMS_CACHE[k][0])
+            _ITEMS_CACHE.pop(oldest, None)
+        _ITEMS_CACHE[cache_key] = (time.monotonic(), items)
+
+    return items
+
+
+# Encoded definition parts cached per folder content signature, so deploying
+# the same PBIP to several workspaces encodes the tree once and reuses it.
+_PARTS_CACHE: Dict[tuple, List[Dict[str, str]]] = {}
+_PARTS_CACHE_LOCK = threading.Lock()
+
+
+def _iter_files(folder: str, _prefix_len: Optional[int] = None):
+    """Recursively yield (full_path, rel_path) pairs via raw os.scandir.
+
+    scandir reuses the directory entry's cached type information, skipping
+    the per-file stat calls and per-directory list building os.walk does.
+    rel_path is sliced off a prefix length computed once for the whole walk,
+    which avoids os.path.relpath's splitdrive/split machinery per file.
+    """
+    if _prefix_len is None:
+        _prefix_len = len(folder.rstrip(os.sep)) + 1
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path, _prefix_len)
+            elif entry.is_file(follow_symlinks=False):
+                rel_path = entry.path[_prefix_len:].replace(os.sep, "/")
+                yield entry.path, rel_path
+
+
+def _folder_signature(folder: str) -> tuple:
+    sig = []
+    for full_path, rel_path in _iter_files(folder):
+        st = os.stat(full_path)
+        sig.append((rel_path, st.st_mtime_ns, st.st_size))
+    return tuple(sorted(sig))
 
-def build_definition_parts_from_folder(folder: str) -> List[Dict[str, str]]:
-    parts = []
 
-    for root, _, files in os.walk(folder):
-        for filename in files:
-            full_path = os.path.join(root, filename)
-            rel_path = os.path.relpath(full_path, folder).replace("\\", "/")
+def build_definition_parts_from_folder(folder: str) -> List[Dict[str, str]]:
+    cache_key = (os.path.abspath(folder), _folder_signature(folder))
+    with _PARTS_CACHE_LOCK:
+        if cache_key in _PARTS_CACHE:
+            return _PARTS_CACHE[cache_key]
 
-            with open(full_path, "rb") as f:
-                content = f.read()
+    # Fail fast on a completely empty folder with one syscall, before any
+    # traversal or encoding work.
+    with os.scandir(folder) as entries:
+        if next(iter(entries), None) is None:
+            raise ValueError(f"No files found in PBIP folder: {folder}")
 
-            parts.append({
-                "path": rel_path,
-                "payload": base64.b64encode(content).decode("ascii"),
-                "payloadType": "InlineBase64",
-            })
+    # Phase 1: enumerate the tree.
+    file_paths = list(_iter_files(folder))
 
-    if not parts:
+    if not file_paths:
         raise ValueError(f"No files found in PBIP folder: {folder}")
 
+    # Identical files (duplicated resources, empty placeholders) share one
+    # encoded string keyed by content digest instead of being re-encoded.
+    payload_cache: Dict[bytes, str] = {}
+
+    def _encode_one(entry: tuple) -> Dict[str, str]:
+        full_path, rel_path = entry
+        with open(full_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                # Encode straight from the mapped pages: the encoder reads the
+                # page cache directly, so the raw bytes are never duplicated
+                # into a Python object before the base64 copy is made.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    digest = hashlib.blake2b(mm, digest_size=16).digest()
+                    payload = payload_cache.get(digest)
+                    if payload is None:
+                        payload = _b64encode(mm).decode("ascii")
+                        payload_cache[digest] = payload
+            else:
+                payload = ""
+        return {
+            "path": rel_path,
+            "payload": payload,
+            "payloadType": "InlineBase64",
+        }
+
+    # Phase 2: read + encode in a thread pool. The work is I/O-bound across
+    # many small files, so overlapping the reads hides disk latency;
+    # executor.map preserves the enumeration order.
+    with ThreadPoolExecutor(max_workers=min(16, len(file_paths))) as executor:
+        parts = list(executor.map(_encode_one, file_paths))
+
+    with _PARTS_CACHE_LOCK:
+        _PARTS_CACHE[cache_key] = parts
+
     return parts
 
 
@@ -148,27 +561,95 @@ def build_definition_parts_from_folder(folder: str) -> List[Dict[str, str]]:
 # ITEM CREATION / UPDATE
 # ======================================================================================
 
+# Folder content fingerprints persisted between runs: when nothing in the
+# PBIP folder changed since the last successful publish, the whole encode +
+# updateDefinition round-trip is skipped. Cache the directory via
+# actions/cache to carry it across CI runs.
+_CONTENT_CACHE_DIR = ".fabric_cache"
+
+# Small shared pool for prefetching network lookups while local file work
+# (hashing, encoding) is in progress.
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+
+def _folder_fingerprint(folder: str) -> str:
+    digest = hashlib.sha256()
+    entries = sorted((rel_path, full_path) for full_path, rel_path in _iter_files(folder))
+
+    for rel_path, full_path in entries:
+        digest.update(rel_path.encode("utf-8"))
+        digest.update(b"\0")
+        with open(full_path, "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def _fingerprint_path(workspace_id: str, item_type: str, display_name: str) -> str:
+    return os.path.join(_CONTENT_CACHE_DIR, workspace_id, item_type, f"{display_name}.sha256")
+
+
+def _read_fingerprint(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write_fingerprint(path: str, fingerprint: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(fingerprint)
+    except OSError:
+        pass
+
+
 def create_or_update_item_from_folder(workspace_id: str, folder: str, item_type: str, token: str) -> str:
     display_name = os.path.basename(folder).split(".", 1)[0]
 
-    print(f"\n=== Publishing {item_type} from folder: {folder}")
-    print(f"Item displayName = {display_name}")
+    # Kick off the items lookup so its round-trip overlaps with hashing the
+    # folder locally; the result is only awaited once the fingerprint is in.
+    future_index = _EXECUTOR.submit(_index_items, workspace_id, token)
+
+    fingerprint = _folder_fingerprint(folder)
+    fp_path = _fingerprint_path(workspace_id, item_type, display_name)
+
+    existing_id = future_index.result().get((item_type, display_name))
+
+    if existing_id is not None and _read_fingerprint(fp_path) == fingerprint:
+        log.info(
+            "✅ %s '%s' unchanged since last publish – skipping (id=%s)",
+            item_type, display_name, existing_id,
+        )
+        return existing_id
+
+    item_id = _publish_item(workspace_id, folder, item_type, display_name, existing_id, token)
+    _write_fingerprint(fp_path, fingerprint)
+    return item_id
+
+
+def _publish_item(
+    workspace_id: str,
+    folder: str,
+    item_type: str,
+    display_name: str,
+    existing_id: Optional[str],
+    token: str,
+) -> str:
+    log.info("=== Publishing %s from folder: %s", item_type, folder)
+    log.info("Item displayName = %s", display_name)
 
     parts = build_definition_parts_from_folder(folder)
     definition = {"parts": parts}
 
-    existing = None
-    for it in list_items_by_type(workspace_id, item_type, token):
-        if it.get("displayName") == display_name:
-            existing = it
-            break
-
     # ------------------------------------------------------------------------------
     # CASE 1 : CREATE NEW ITEM
     # ------------------------------------------------------------------------------
 
-    if existing is None:
-        print(f"🆕 Creating new {item_type} '{display_name}'")
+    if existing_id is None:
+        log.info("🆕 Creating new %s '%s'", item_type, display_name)
 
         body = {
             "displayName": display_name,
@@ -188,43 +669,57 @@ def create_or_update_item_from_folder(workspace_id: str, folder: str, item_type:
 
         if status == 201:
             # Success normal
-            item = resp.json()
-            print(f"✅ Created {item_type} '{display_name}' (id={item['id']})")
+            item = _loads(resp.content)
+            _invalidate_items_cache(workspace_id, item_type)
+            log.info("✅ Created %s '%s' (id=%s)", item_type, display_name, item["id"])
             return item["id"]
 
         if status == 202:
-            print("⏳ Item creation accepted (202). Polling every 3 seconds until creation is complete...")
-
-            item_id = None
-            retries = 0
-            max_retries = 40  # = 2 minutes max
+            log.info("⏳ Item creation accepted (202). Waiting for the async operation to complete...")
 
-            while retries < max_retries:
+            # Preferred path: poll the operation URL from the Location header.
+            if _wait_for_operation(resp, token) is not None:
+                _invalidate_items_cache(workspace_id, item_type)
+                for it in list_items_by_type(workspace_id, item_type, token):
+                    if it.get("displayName") == display_name:
+                        log.info("🎉 Successfully detected created item: %s", it["id"])
+                        return it["id"]
+                raise FabricApiError(
+                    f"Operation succeeded but item '{display_name}' was not found."
+                )
+
+            # No Location header – fall back to polling the items list with
+            # jittered exponential backoff instead of a fixed 3s tick.
+            deadline = time.monotonic() + 120
+            attempt = 0
+
+            while time.monotonic() < deadline:
+                time.sleep(_poll_delay(attempt))
+                attempt += 1
+
+                # The cached listing predates the create, so force a re-fetch.
+                _invalidate_items_cache(workspace_id, item_type)
                 items = list_items_by_type(workspace_id, item_type, token)
 
                 for it in items:
                     if it.get("displayName") == display_name:
                         item_id = it["id"]
-                        print(f"🎉 Successfully detected created item: {item_id}")
+                        log.info("🎉 Successfully detected created item: %s", item_id)
                         return item_id
 
-                retries += 1
-                time.sleep(3)
-
             raise FabricApiError(f"Timeout: Item '{display_name}' did not appear after 2 minutes.")
 
         # Any other status but not 201/202
-        print("\n❌ FABRIC DID NOT RETURN A VALID ITEM ON CREATION")
-        print("Raw response:")
-        print(resp.text)
+        log.error("❌ FABRIC DID NOT RETURN A VALID ITEM ON CREATION")
+        log.error("Raw response: %s", resp.content[:2048].decode("utf-8", "replace"))
         raise FabricApiError(f"Fabric failed to create {item_type} '{display_name}'.")
 
     # ------------------------------------------------------------------------------
     # CASE 2 : UPDATE EXISTING ITEM
     # ------------------------------------------------------------------------------
 
-    item_id = existing["id"]
-    print(f"🔄 Updating existing {item_type} '{display_name}' (id={item_id})")
+    item_id = existing_id
+    log.info("🔄 Updating existing %s '%s' (id=%s)", item_type, display_name, item_id)
 
     body = {"definition": definition}
 
@@ -235,16 +730,82 @@ def create_or_update_item_from_folder(workspace_id: str, folder: str, item_type:
         json=body,
     )
 
+    if resp.status_code == 202:
+        # updateDefinition is async: wait for the operation instead of
+        # racing subsequent calls against an update still in flight.
+        _wait_for_operation(resp, token)
+        log.info("✅ Updated %s '%s' (id=%s)", item_type, display_name, item_id)
+        return item_id
+
     try:
-        json_resp = resp.json()
+        json_resp = _loads(resp.content)
     except Exception:
         json_resp = None
 
     if json_resp is None:
-        print("⚠️ WARNING: Fabric returned NO JSON for update.")
-        print("Raw response:")
-        print(resp.text)
-        print("Continuing...")
+        log.warning(
+            "⚠️ Fabric returned NO JSON for update. Raw response: %s",
+            resp.content[:2048].decode("utf-8", "replace"),
+        )
+        log.warning("Continuing...")
 
-    print(f"✅ Updated {item_type} '{display_name}' (id={item_id})")
+    log.info("✅ Updated %s '%s' (id=%s)", item_type, display_name, item_id)
     return item_id
+
+
+# ======================================================================================
+# Multi-item publish
+# ======================================================================================
+
+def publish_items_from_folders(workspace_id: str, targets: List[tuple], token: str) -> Dict[str, str]:
+    """Publish several PBIP folders to one workspace in two phases.
+
+    Fabric exposes no batch endpoint, so the next best thing is done here:
+    the combined items index is warmed with one GET and the create/update
+    calls run through one thread pool over the shared session. Reports bind
+    to their semantic model via byPath references in definition.pbir, so on
+    a fresh workspace the model must exist before the report create – all
+    SemanticModel targets are published first, then everything else, with
+    parallelism only within each phase. Failures are collected per folder
+    so every item gets its chance before the error surfaces.
+    """
+    if not targets:
+        return {}
+
+    # One listing serves every existence lookup below.
+    _index_items(workspace_id, token)
+
+    phases = [
+        [t for t in targets if t[1] == "SemanticModel"],
+        [t for t in targets if t[1] != "SemanticModel"],
+    ]
+
+    results: Dict[str, str] = {}
+    errors = []
+
+    for phase in phases:
+        if not phase:
+            continue
+
+        with ThreadPoolExecutor(max_workers=min(8, len(phase))) as executor:
+            futures = {
+                executor.submit(
+                    create_or_update_item_from_folder,
+                    workspace_id=workspace_id,
+                    folder=folder,
+                    item_type=item_type,
+                    token=token,
+                ): folder
+                for folder, item_type in phase
+            }
+            for future in as_completed(futures):
+                folder = futures[future]
+                try:
+                    results[folder] = future.result()
+                except Exception as exc:
+                    errors.append(f"{folder}: {exc}")
+
+    if errors:
+        raise FabricApiError("Failed to publish: " + "; ".join(errors))
+
+    return results